@@ -1,63 +1,86 @@
 import streamlit as st
-import asyncio
-from openai import AsyncOpenAI, OpenAI
-from core.database import connect_db, close_db, get_database, ProxyConfig
-from typing import AsyncGenerator
+import httpx
+from openai import OpenAI
+from admin.utils import load_configs
+from typing import Generator
 import os
+import time
 
 
 proxy_api_url = os.getenv("PROXY_API_URL", "http://localhost:8000/v1")
 
+# 对话页面默认渲染的最近消息条数
+max_rendered_messages = 20
 
-async def fetch_configs():
-    db = get_database()
-    configs = await db["configurations"].find().to_list(None)
-    return [ProxyConfig(**config) for config in configs]
+# 流式输出时累积的 token 数或时间间隔（秒）达到阈值后再刷新到页面
+stream_flush_tokens = 8
+stream_flush_interval = 0.05
 
+# 连接池参数，客户端在 rerun 之间复用以避免每条消息重新握手
+http_limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# 与 OpenAI SDK 默认值一致，避免本地模型首 token 较慢时读取超时
+http_timeout = httpx.Timeout(600.0, connect=5.0)
 
-async def send_message_stream(
-    proxy_model: str, message: str
-) -> AsyncGenerator[str, None]:
-    """Send a message to the API and stream the response using AsyncOpenAI"""
+
+@st.cache_resource
+def get_sync_client() -> OpenAI:
+    """OpenAI client shared across reruns"""
+    return OpenAI(
+        base_url=proxy_api_url,
+        api_key="not-needed",  # The proxy doesn't require an API key
+        http_client=httpx.Client(limits=http_limits, timeout=http_timeout),
+    )
+
+
+def send_message_stream(proxy_model: str, message: str) -> Generator[str, None, None]:
+    """Send a message to the API and stream the response using OpenAI
+
+    The sync client's iterator is handed to st.write_stream directly, so
+    tokens don't cross an async-to-sync bridge on the way to the page.
+    """
     try:
-        # Create an AsyncOpenAI client pointing to our local proxy
-        client = AsyncOpenAI(
-            base_url=proxy_api_url,
-            api_key="not-needed",  # The proxy doesn't require an API key
-        )
+        client = get_sync_client()
 
         # Create the messages for the chat completion
         messages = [{"role": "user", "content": message}]
 
         # Make the streaming request
-        stream = await client.chat.completions.create(
+        stream = client.chat.completions.create(
             model=proxy_model, messages=messages, stream=True
         )
 
-        # Process the streaming response
-        async for chunk in stream:
+        # Process the streaming response, coalescing tokens into batches so
+        # Streamlit re-renders at a steady rate instead of once per token
+        buffer = []
+        last_flush = time.monotonic()
+        for chunk in stream:
             # Extract content from the chunk if it exists
             if chunk.choices and chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                yield content
+                buffer.append(chunk.choices[0].delta.content)
+                if (
+                    len(buffer) >= stream_flush_tokens
+                    or time.monotonic() - last_flush > stream_flush_interval
+                ):
+                    yield "".join(buffer)
+                    buffer.clear()
+                    last_flush = time.monotonic()
+
+        if buffer:
+            yield "".join(buffer)
 
     except Exception as e:
         yield f"An unexpected error occurred: {e}"
 
 
-async def send_message(proxy_model: str, message: str, stream: bool = True):
+def send_message(proxy_model: str, message: str, stream: bool = True):
     """Send a message to the API with option for streaming or non-streaming response"""
     if stream:
         # For streaming, we'll return a generator
         return send_message_stream(proxy_model, message)
 
-    # Non-streaming implementation using AsyncOpenAI
+    # Non-streaming implementation using OpenAI
     try:
-        # Create an AsyncOpenAI client pointing to our local proxy
-        client = OpenAI(
-            base_url="http://localhost:8000/v1",
-            api_key="not-needed",  # The proxy doesn't require an API key
-        )
+        client = get_sync_client()
 
         # Create the messages for the chat completion
         messages = [{"role": "user", "content": message}]
@@ -75,10 +98,7 @@ async def send_message(proxy_model: str, message: str, stream: bool = True):
 
 def main():
     # st.title("异步对话")
-    # Run async functions in synchronous context
-    asyncio.run(connect_db())
-    configs = asyncio.run(fetch_configs())
-    asyncio.run(close_db())
+    configs = load_configs()
 
     if not configs:
         st.warning("请先在配置管理页面添加代理配置。")
@@ -93,7 +113,15 @@ def main():
     if "conversation_history" not in st.session_state:
         st.session_state.conversation_history = []
 
-    for message in st.session_state.conversation_history:
+    # 只渲染最近的消息，更早的消息按需展开，避免每次 rerun 重新渲染整个对话
+    history = st.session_state.conversation_history
+    earlier_messages = history[:-max_rendered_messages]
+    if earlier_messages and st.toggle(f"显示更早的 {len(earlier_messages)} 条消息"):
+        for message in earlier_messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+
+    for message in history[-max_rendered_messages:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -120,9 +148,9 @@ def main():
                 # Non-streaming mode
                 with st.spinner("思考中..."):
                     try:
-                        # Run the async function in a synchronous context
-                        full_response = asyncio.run(
-                            send_message(selected_model, prompt, stream=False)
+                        # 非流式请求使用同步客户端，无需为每条消息创建事件循环
+                        full_response = send_message(
+                            selected_model, prompt, stream=False
                         )
                         st.markdown(full_response)
                     except Exception as e:
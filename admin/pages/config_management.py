@@ -1,13 +1,8 @@
 import streamlit as st
-from core.database import connect_db, close_db, get_database, ProxyConfig
+from core.config import CONFIG_CACHE_TTL
+from core.database import get_database
+from admin.utils import init_db, load_configs, run_async
 from typing import Optional
-import asyncio
-
-
-async def fetch_configs():
-    db = get_database()
-    configs = await db["configurations"].find().to_list(None)
-    return [ProxyConfig(**config) for config in configs]
 
 
 async def add_config(
@@ -16,13 +11,13 @@ async def add_config(
     backend_model_name: str,
     backend_api_key: Optional[str],
     ignore_ssl_verify: bool,
+    log_response_body: bool,
 ):
     db = get_database()
     existing_config = await db["configurations"].find_one(
         {"proxy_model_name": proxy_model_name}
     )
     if existing_config:
-        st.error(f"Proxy model name '{proxy_model_name}' already exists.")
         return False
     new_config = {
         "proxy_model_name": proxy_model_name,
@@ -30,9 +25,9 @@ async def add_config(
         "backend_model_name": backend_model_name,
         "backend_api_key": backend_api_key,
         "ignore_ssl_verify": ignore_ssl_verify,
+        "log_response_body": log_response_body,
     }
     await db["configurations"].insert_one(new_config)
-    st.success("Configuration added successfully!")
     return True
 
 
@@ -42,6 +37,7 @@ async def update_config(
     new_backend_model_name: str,
     new_backend_api_key: Optional[str],
     new_ignore_ssl_verify: bool,
+    new_log_response_body: bool,
 ):
     db = get_database()
     result = await db["configurations"].update_one(
@@ -52,17 +48,11 @@ async def update_config(
                 "backend_model_name": new_backend_model_name,
                 "backend_api_key": new_backend_api_key,
                 "ignore_ssl_verify": new_ignore_ssl_verify,
+                "log_response_body": new_log_response_body,
             }
         },
     )
-    if result.modified_count > 0:
-        st.success(f"Configuration for '{proxy_model_name}' updated successfully!")
-        return True
-    else:
-        st.warning(
-            f"Configuration for '{proxy_model_name}' not found or no changes were made."
-        )
-        return False
+    return result.modified_count > 0
 
 
 async def delete_config(proxy_model_name: str):
@@ -70,18 +60,26 @@ async def delete_config(proxy_model_name: str):
     result = await db["configurations"].delete_one(
         {"proxy_model_name": proxy_model_name}
     )
-    if result.deleted_count > 0:
-        st.success(f"Configuration for '{proxy_model_name}' deleted successfully!")
-        return True
-    else:
-        st.warning(f"Configuration for '{proxy_model_name}' not found.")
-        return False
+    return result.deleted_count > 0
+
+
+def show_after_rerun(message: str):
+    """保存成功提示，在 st.rerun() 之后的下一次渲染中显示"""
+    st.session_state.config_management_notice = (
+        f"{message} The proxy picks up the change within about "
+        f"{CONFIG_CACHE_TTL:g} seconds."
+    )
 
 
-async def amain():
+def main():
+    # st.title("Configuration Management")
+    # 数据库操作都提交到后台事件循环，界面渲染留在脚本线程中
+    init_db()
+    notice = st.session_state.pop("config_management_notice", None)
+    if notice:
+        st.success(notice)
     st.subheader("Current Configurations")
-    await connect_db()
-    configs = await fetch_configs()
+    configs = load_configs()
     if configs:
         config_data = [
             {
@@ -90,6 +88,7 @@ async def amain():
                 "Backend Model Name": config.backend_model_name,
                 "Backend API Key": config.backend_api_key,
                 "Ignore SSL Verify": config.ignore_ssl_verify,
+                "Log Response Body": config.log_response_body,
             }
             for config in configs
         ]
@@ -110,16 +109,26 @@ async def amain():
         new_ignore_ssl_verify = st.checkbox(
             "Ignore SSL Verification", key="add_ignore_ssl_verify", value=False
         )
+        new_log_response_body = st.checkbox(
+            "Log Response Body", key="add_log_response_body", value=True
+        )
         submitted_add = st.form_submit_button("Add Configuration")
         if submitted_add:
-            if await add_config(
-                new_proxy_model_name,
-                new_base_url,
-                new_backend_model_name,
-                new_backend_api_key,
-                new_ignore_ssl_verify,
+            if run_async(
+                add_config(
+                    new_proxy_model_name,
+                    new_base_url,
+                    new_backend_model_name,
+                    new_backend_api_key,
+                    new_ignore_ssl_verify,
+                    new_log_response_body,
+                )
             ):
+                show_after_rerun("Configuration added successfully!")
+                load_configs.clear()
                 st.rerun()
+            else:
+                st.error(f"Proxy model name '{new_proxy_model_name}' already exists.")
 
     st.subheader("Edit Configuration")
     edit_proxy_model_name = st.selectbox(
@@ -155,16 +164,32 @@ async def amain():
                     value=selected_config.ignore_ssl_verify,
                     key="edit_ignore_ssl_verify",
                 )
+                edit_log_response_body = st.checkbox(
+                    "Log Response Body",
+                    value=selected_config.log_response_body,
+                    key="edit_log_response_body",
+                )
                 submitted_edit = st.form_submit_button("Update Configuration")
                 if submitted_edit:
-                    if await update_config(
-                        edit_proxy_model_name,
-                        edit_base_url,
-                        edit_backend_model_name,
-                        edit_backend_api_key,
-                        edit_ignore_ssl_verify,
+                    if run_async(
+                        update_config(
+                            edit_proxy_model_name,
+                            edit_base_url,
+                            edit_backend_model_name,
+                            edit_backend_api_key,
+                            edit_ignore_ssl_verify,
+                            edit_log_response_body,
+                        )
                     ):
+                        show_after_rerun(
+                            f"Configuration for '{edit_proxy_model_name}' updated successfully!"
+                        )
+                        load_configs.clear()
                         st.rerun()
+                    else:
+                        st.warning(
+                            f"Configuration for '{edit_proxy_model_name}' not found or no changes were made."
+                        )
 
     st.subheader("Delete Configuration")
     delete_proxy_model_name = st.selectbox(
@@ -173,14 +198,14 @@ async def amain():
     )
     if delete_proxy_model_name:
         if st.button(f"Delete Configuration for '{delete_proxy_model_name}'"):
-            if await delete_config(delete_proxy_model_name):
+            if run_async(delete_config(delete_proxy_model_name)):
+                show_after_rerun(
+                    f"Configuration for '{delete_proxy_model_name}' deleted successfully!"
+                )
+                load_configs.clear()
                 st.rerun()
-    await close_db()
-
-
-def main():
-    # st.title("Configuration Management")
-    asyncio.run(amain())
+            else:
+                st.warning(f"Configuration for '{delete_proxy_model_name}' not found.")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,39 @@
 import streamlit as st
 import asyncio
 import json
-import re
+import orjson
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from core.database import connect_db, close_db, get_database, LogEntry
+from core.database import get_database, LogEntry
+from admin.utils import init_db, run_async
 from typing import List, Dict, Any, Optional
 import pandas as pd
 import time
 
+# 列表视图只需要摘要字段，请求体/响应体等大字段在查看详情时再单独加载
+LOG_SUMMARY_PROJECTION = {
+    "request_headers": 0,
+    "request_body": 0,
+    "response_headers": 0,
+    "response_body": 0,
+}
+
+# 当前系统时区，模块加载时解析一次
+try:
+    LOCAL_TZ = ZoneInfo(time.tzname[0])
+except Exception:
+    # 如果无法获取系统时区，使用东八区作为默认值
+    LOCAL_TZ = ZoneInfo("Asia/Shanghai")
+
+# 流式响应默认预览的原始数据块数量
+MAX_PREVIEW_CHUNKS = 50
+
+# 判断响应体是否为SSE格式时检查的前缀长度
+SSE_PREFIX_WINDOW = 64
+
+# 带过滤条件时精确计数的上限，超过后分页信息显示为 "10000+"
+LOG_COUNT_LIMIT = 10000
+
 
 async def fetch_logs(
     limit: int = 100, 
@@ -49,55 +74,73 @@ async def fetch_logs(
         filter_query["request_method"] = request_method
     
     # 执行查询
-    cursor = db["logs"].find(filter_query).sort("timestamp", -1).skip(skip).limit(limit)
-    logs = await cursor.to_list(length=limit)
+    cursor = (
+        db["logs"]
+        .find(filter_query, LOG_SUMMARY_PROJECTION)
+        .sort("timestamp", -1)
+        .skip(skip)
+        .limit(limit)
+    )
     
-    # 获取总数
-    total_count = await db["logs"].count_documents(filter_query)
+    # 获取总数：只计数到上限为止（页面总是带有日期范围，不会出现无过滤条件的查询）
+    count = db["logs"].count_documents(filter_query, limit=LOG_COUNT_LIMIT)
+    
+    # 分页查询与计数并发执行
+    logs, total_count = await asyncio.gather(cursor.to_list(length=limit), count)
     
     return logs, total_count
 
 
+async def fetch_log_detail(log_id):
+    """按 _id 获取完整的日志记录"""
+    db = get_database()
+    return await db["logs"].find_one({"_id": log_id})
+
+
+def is_sse_data(data):
+    """根据开头部分判断字符串是否为SSE流式响应"""
+    return 'data:' in data[:SSE_PREFIX_WINDOW]
+
+
 def process_stream_data(data):
     """处理流式响应数据，尝试将每个数据块解析为JSON，并连接content部分"""
     if not isinstance(data, str):
         return data
         
-    # 检查是否是流式响应格式
-    if not data.startswith('data:') and '{"' not in data:
+    # 检查是否是流式响应格式，只检查开头部分，避免扫描整个大响应体
+    if not is_sse_data(data):
         return data
         
-    # 尝试提取所有的JSON块
-    combined_content = ""
+    # 尝试提取所有的JSON块，内容片段先收集到列表中最后再拼接
+    content_parts = []
     json_objects = []
     
     # 处理SSE格式的数据（data: {...}\n\n）
-    if 'data:' in data:
-        # 分割数据块
-        chunks = re.split(r'\n\n', data)
-        for chunk in chunks:
-            if not chunk.strip():
-                continue
+    # 分割数据块
+    chunks = data.split('\n\n')
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+            
+        # 处理每个数据块
+        if chunk.startswith('data:'):
+            json_str = chunk[5:].strip()
+            try:
+                json_obj = orjson.loads(json_str)
+                json_objects.append(json_obj)
                 
-            # 处理每个数据块
-            if chunk.startswith('data:'):
-                json_str = chunk[5:].strip()
-                try:
-                    json_obj = json.loads(json_str)
-                    json_objects.append(json_obj)
-                    
-                    # 提取content字段
-                    if 'choices' in json_obj and len(json_obj['choices']) > 0:
-                        if 'delta' in json_obj['choices'][0] and 'content' in json_obj['choices'][0]['delta']:
-                            content = json_obj['choices'][0]['delta']['content']
-                            if content is not None:  # Check if content is None before concatenating
-                                combined_content += content
-                        elif 'text' in json_obj['choices'][0]:
-                            text = json_obj['choices'][0]['text']
-                            if text is not None:  # Also check if text is None before concatenating
-                                combined_content += text
-                except json.JSONDecodeError:
-                    pass  # 忽略无法解析的块
+                # 提取content字段
+                if 'choices' in json_obj and len(json_obj['choices']) > 0:
+                    if 'delta' in json_obj['choices'][0] and 'content' in json_obj['choices'][0]['delta']:
+                        content = json_obj['choices'][0]['delta']['content']
+                        if content is not None:  # Check if content is None before concatenating
+                            content_parts.append(content)
+                    elif 'text' in json_obj['choices'][0]:
+                        text = json_obj['choices'][0]['text']
+                        if text is not None:  # Also check if text is None before concatenating
+                            content_parts.append(text)
+            except orjson.JSONDecodeError:
+                pass  # 忽略无法解析的块
     
     # 如果没有有效的JSON对象，返回原始数据
     if not json_objects:
@@ -106,7 +149,7 @@ def process_stream_data(data):
     # 创建结果对象
     result = {
         "original_chunks": json_objects,
-        "combined_content": combined_content
+        "combined_content": "".join(content_parts)
     }
     
     return result
@@ -124,7 +167,7 @@ def format_json(data):
     # 如果是字符串，尝试先处理流式数据
     if isinstance(data, str):
         # 先尝试处理流式数据
-        if 'data:' in data or '\n\n' in data:
+        if is_sse_data(data):
             stream_result = process_stream_data(data)
             if isinstance(stream_result, dict) and 'combined_content' in stream_result:
                 return stream_result
@@ -148,22 +191,19 @@ def format_timestamp(timestamp):
             # 如果时间没有时区信息，假设它是UTC时间
             timestamp = timestamp.replace(tzinfo=ZoneInfo("UTC"))
         
-        try:
-            # 获取当前系统时区
-            # 尝试使用系统时区
-            local_timezone = ZoneInfo(time.tzname[0])
-        except:
-            # 如果无法获取系统时区，使用东八区作为默认值
-            local_timezone = ZoneInfo("Asia/Shanghai")
-        
         # 转换为当前时区
-        local_time = timestamp.astimezone(local_timezone)
+        local_time = timestamp.astimezone(LOCAL_TZ)
         
         # 格式化为易读格式
         return local_time.strftime("%Y-%m-%d %H:%M:%S")
     return str(timestamp)
 
 
+def show_json(data):
+    """使用 orjson 序列化后以代码块显示，避免 st.json 逐字段渲染大对象"""
+    st.code(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2).decode(), language="json")
+
+
 def display_log_details(log):
     """显示日志详情"""
     col1, col2 = st.columns(2)
@@ -175,7 +215,7 @@ def display_log_details(log):
         st.write(f"**时间:** {format_timestamp(log.get('timestamp'))}")
         
         with st.expander("请求头"):
-            st.json(log.get('request_headers', {}))
+            show_json(log.get('request_headers', {}))
         
         with st.expander("请求体"):
             request_body = log.get('request_body')
@@ -186,7 +226,7 @@ def display_log_details(log):
                 # 判断格式化后的数据类型
                 if isinstance(formatted_data, dict):
                     # 如果是字典，使用JSON格式显示
-                    st.json(formatted_data)
+                    show_json(formatted_data)
                 elif isinstance(formatted_data, str):
                     # 判断字符串是否过长
                     if len(formatted_data) > 5000:
@@ -207,7 +247,7 @@ def display_log_details(log):
         st.write(f"**处理时间:** {log.get('processing_time', 0):.4f} 秒")
         
         with st.expander("响应头"):
-            st.json(log.get('response_headers', {}))
+            show_json(log.get('response_headers', {}))
         
         # 响应体处理
         response_body = log.get('response_body')
@@ -224,13 +264,18 @@ def display_log_details(log):
                     st.write(formatted_data['combined_content'])
                 
                 with st.expander("原始数据块"):
-                    st.json(formatted_data['original_chunks'])
+                    original_chunks = formatted_data['original_chunks']
+                    if len(original_chunks) > MAX_PREVIEW_CHUNKS and not st.toggle(
+                        f"显示全部 {len(original_chunks)} 个数据块", key="log_viewer_show_all_chunks"
+                    ):
+                        original_chunks = original_chunks[:MAX_PREVIEW_CHUNKS]
+                    show_json(original_chunks)
             
             # 处理普通字典
             elif isinstance(formatted_data, dict):
                 with st.expander("响应体"):
                     # 如果是字典，使用JSON格式显示
-                    st.json(formatted_data)
+                    show_json(formatted_data)
             
             # 处理字符串
             elif isinstance(formatted_data, str):
@@ -250,24 +295,26 @@ def display_log_details(log):
 
 def create_log_dataframe(logs):
     """将日志转换为DataFrame以便于显示"""
-    data = []
-    for log in logs:
-        data.append({
-            "时间": format_timestamp(log.get("timestamp")),
-            "方法": log.get("request_method"),
-            "路径": log.get("request_path"),
-            "状态码": log.get("response_status_code"),
-            "处理时间(秒)": round(log.get("processing_time", 0), 4),
-            "原始数据": log
-        })
-    return pd.DataFrame(data)
+    # 时间列整体转换时区并格式化，MongoDB 返回的无时区时间按 UTC 处理
+    timestamps = (
+        pd.to_datetime([log.get("timestamp") for log in logs], utc=True)
+        .tz_convert(LOCAL_TZ)
+        .strftime("%Y-%m-%d %H:%M:%S")
+    )
+    return pd.DataFrame({
+        "时间": timestamps,
+        "方法": [log.get("request_method") for log in logs],
+        "路径": [log.get("request_path") for log in logs],
+        "状态码": [log.get("response_status_code") for log in logs],
+        "处理时间(秒)": [round(log.get("processing_time", 0), 4) for log in logs],
+    })
 
 
 def main():
     st.title("日志查询")
     
-    # 连接数据库
-    asyncio.run(connect_db())
+    # 连接数据库（客户端在 rerun 之间复用）
+    init_db()
     
     # 创建过滤器
     with st.expander("过滤选项", expanded=True):
@@ -327,7 +374,7 @@ def main():
         query["response_status_code"] = status_code_filter
     
     # 获取日志数据
-    logs, total_count = asyncio.run(
+    logs, total_count = run_async(
         fetch_logs(
             limit=page_size,
             skip=st.session_state.log_viewer_page_number * page_size,
@@ -341,7 +388,14 @@ def main():
     
     # 显示分页信息
     total_pages = (total_count + page_size - 1) // page_size
-    st.write(f"共 {total_count} 条记录，当前第 {st.session_state.log_viewer_page_number + 1}/{max(1, total_pages)} 页")
+    # 计数达到上限时实际总数未知，只要当前页是满的就允许继续翻页
+    count_capped = total_count == LOG_COUNT_LIMIT
+    has_next_page = st.session_state.log_viewer_page_number < total_pages - 1 or (
+        count_capped and len(logs) == page_size
+    )
+    total_display = f"{total_count}+" if count_capped else total_count
+    pages_display = "…" if count_capped else max(1, total_pages)
+    st.write(f"共 {total_display} 条记录，当前第 {st.session_state.log_viewer_page_number + 1}/{pages_display} 页")
     
     # 分页控制按钮
     col1, col2, col3, col4 = st.columns([1, 1, 2, 1])
@@ -351,7 +405,7 @@ def main():
             st.rerun()
     
     with col2:
-        if st.button("下一页", key="log_viewer_next_page") and st.session_state.log_viewer_page_number < total_pages - 1:
+        if st.button("下一页", key="log_viewer_next_page") and has_next_page:
             st.session_state.log_viewer_page_number += 1
             st.rerun()
     
@@ -365,7 +419,7 @@ def main():
         
         # 显示日志表格
         st.dataframe(
-            df.drop(columns=["原始数据"]), 
+            df, 
             use_container_width=True,
             hide_index=True
         )
@@ -380,12 +434,13 @@ def main():
         
         if selected_log_index is not None:
             st.divider()
-            display_log_details(logs[selected_log_index])
+            log_detail = run_async(fetch_log_detail(logs[selected_log_index]["_id"]))
+            if log_detail:
+                display_log_details(log_detail)
+            else:
+                st.warning("该日志记录已不存在")
     else:
         st.info("没有找到符合条件的日志记录")
-    
-    # 关闭数据库连接
-    asyncio.run(close_db())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from typing import Awaitable, List, TypeVar
+
+import streamlit as st
+
+from core.database import connect_db, get_database, ProxyConfig
+
+T = TypeVar("T")
+
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """后台常驻的事件循环
+
+    Streamlit 每次 rerun 都会重新执行页面脚本，如果每次都用 asyncio.run 创建新的事件循环，
+    绑定在旧循环上的异步客户端（如 Motor）就无法跨 rerun 复用。
+    这里在守护线程中运行一个进程级的事件循环，所有异步调用都提交到它上面执行。
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """在后台事件循环中执行协程并同步等待结果"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+@st.cache_resource
+def init_db() -> None:
+    """在后台事件循环中创建一次 MongoDB 客户端，各页面在 rerun 之间共享其连接池"""
+    run_async(connect_db())
+
+
+async def fetch_configs() -> List[ProxyConfig]:
+    db = get_database()
+    configs = await db["configurations"].find({}, {"_id": 0}).to_list(None)
+    return [ProxyConfig.model_validate(config) for config in configs]
+
+
+@st.cache_data(ttl=60)
+def load_configs() -> List[ProxyConfig]:
+    """缓存的代理配置列表，增删改配置后需调用 load_configs.clear() 使其失效"""
+    init_db()
+    return run_async(fetch_configs())
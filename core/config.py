@@ -5,3 +5,11 @@ load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "lite_proxy")
+
+# 代理服务缓存代理配置的时间（秒），管理界面修改配置后最多延迟这么久生效
+CONFIG_CACHE_TTL = float(os.getenv("CONFIG_CACHE_TTL", "30"))
+# 不存在的代理模型名称的缓存时间（秒），较短以便新添加的配置尽快生效
+CONFIG_MISS_CACHE_TTL = float(os.getenv("CONFIG_MISS_CACHE_TTL", "2"))
+
+# 运行环境，设为 prod 时关闭 OpenAPI 文档
+ENV = os.getenv("ENV", "dev")
@@ -1,7 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, Union
 from datetime import datetime, timezone
+from functools import cached_property
 
 from core.config import MONGODB_URI, DATABASE_NAME
 
@@ -11,6 +12,17 @@ client: AsyncIOMotorClient = None
 async def connect_db():
     global client
     client = AsyncIOMotorClient(MONGODB_URI)
+    await create_indexes()
+
+
+async def create_indexes():
+    db = get_database()
+    # 日志查询按时间倒序分页，并按状态码、请求方法过滤
+    await db["logs"].create_index(
+        [("timestamp", -1), ("response_status_code", 1), ("request_method", 1)]
+    )
+    # 代理请求和配置管理都按代理模型名称查找配置
+    await db["configurations"].create_index("proxy_model_name", unique=True)
 
 
 async def close_db():
@@ -30,15 +42,29 @@ class ProxyConfig(BaseModel):
     backend_model_name: str
     backend_api_key: Optional[str] = None
     ignore_ssl_verify: bool = False
+    log_response_body: bool = True  # 关闭后日志中不记录响应体
+
+    @cached_property
+    def backend_headers(self) -> Dict[str, str]:
+        """转发到后端时使用的请求头，按配置对象缓存，调用方不应修改"""
+        headers = {"Content-Type": "application/json"}
+        if self.backend_api_key:
+            headers["Authorization"] = f"Bearer {self.backend_api_key}"
+        return headers
+
+    @cached_property
+    def chat_completions_url(self) -> str:
+        """后端的 chat/completions 地址，按配置对象缓存"""
+        return f"{self.base_url.rstrip('/')}/v1/chat/completions"
 
 
 class LogEntry(BaseModel):
-    timestamp: datetime = datetime.now(timezone.utc)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     request_method: str
     request_path: str
     request_headers: Dict[str, Any]
-    request_body: Optional[Dict[str, Any]] = None
+    request_body: Optional[Union[Dict[str, Any], str]] = None
     response_status_code: int
     response_headers: Dict[str, Any]
-    response_body: Optional[Dict[str, Any]] = None
+    response_body: Optional[Union[Dict[str, Any], str]] = None
     processing_time: float
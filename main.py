@@ -1,16 +1,28 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.routing import APIRouter
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 import asyncio
 
+from core.config import ENV
 from core.database import connect_db, close_db
 from proxy.api_routes import router as proxy_router
+from proxy.proxy_logic import (
+    open_http_clients,
+    close_http_clients,
+    start_log_worker,
+    stop_log_worker,
+)
 
 
 async def lifespan(app: FastAPI):
     await connect_db()
+    await open_http_clients()
+    await start_log_worker()
     yield
+    await stop_log_worker()
+    await close_http_clients()
     await close_db()
 
 
@@ -18,9 +30,14 @@ app = FastAPI(
     title="Lite Proxy",
     version="0.1.0",
     description="A lightweight proxy for OpenAI-compatible APIs.",
+    # 生产环境不生成 OpenAPI 文档，/docs 和 /redoc 也随之关闭
+    openapi_url=None if ENV == "prod" else "/openapi.json",
     lifespan=lifespan,
 )
 
+# 压缩模型列表和非流式补全等较大的 JSON 响应；Starlette 0.46 起默认不压缩 text/event-stream（见 requirements.txt），流式响应仍逐块下发
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 
 # 健康检查接口
 @app.get("/health")
@@ -31,6 +48,15 @@ async def health_check():
 app.include_router(proxy_router, prefix="/v1")
 
 if __name__ == "__main__":
+    import os
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    # 生产模式启动：不启用 reload、关闭访问日志，uvicorn[standard] 会自动使用 uvloop 和 httptools
+    # 开发时使用 `uvicorn main:app --reload` 启动
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WORKERS", os.cpu_count() or 1)),
+        access_log=False,
+    )
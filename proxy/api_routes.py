@@ -1,23 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, HTTPException
 from starlette.requests import Request
-from typing import Optional
+from typing import Any, Dict, Optional
 from fastapi import Header
 from . import proxy_logic
-from .models import ChatCompletionRequest, ChatCompletionResponse, ModelsResponse
 
 router = APIRouter()
 
 
-@router.post("/chat/completions", response_model=ChatCompletionResponse)
+@router.post("/chat/completions")
 async def chat_completions(
     request: Request,
-    body: ChatCompletionRequest,
+    body: Dict[str, Any] = Body(...),
     authorization: Optional[str] = Header(None),
 ):
-    # print("/chat/completions called")
-    return await proxy_logic.proxy_request(request, body.model, authorization)
+    # 代理只需要读取 model 字段，其余内容原样转发，不做完整的 ChatCompletionRequest 校验
+    model = body.get("model")
+    if not isinstance(model, str):
+        raise HTTPException(status_code=422, detail="Field 'model' is required.")
+    return await proxy_logic.proxy_request(request, model, authorization)
 
 
-@router.get("/models", response_model=ModelsResponse)
+@router.get("/models")
 async def get_models(request: Request, authorization: Optional[str] = Header(None)):
     return await proxy_logic.proxy_models_request(request, authorization)
@@ -1,45 +1,258 @@
+import asyncio
+import logging
 import httpx
 from fastapi import HTTPException, Header, Response
 from starlette.requests import Request
 from starlette.responses import StreamingResponse
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import time
 from datetime import datetime, timezone
 from json import JSONDecodeError
 import json
+import orjson
+from pymongo import WriteConcern
 
-from core.database import get_database, ProxyConfig, LogEntry
+from core.config import CONFIG_CACHE_TTL, CONFIG_MISS_CACHE_TTL
+from core.database import get_database, ProxyConfig
+
+logger = logging.getLogger(__name__)
+
+# 按是否校验 SSL 证书区分的共享客户端，连接池在整个应用生命周期内复用
+http_clients: Dict[bool, httpx.AsyncClient] = {}
+
+
+async def open_http_clients():
+    for verify in (True, False):
+        # 后端支持 HTTP/2 时多个并发请求复用同一连接，不支持时自动回退到 HTTP/1.1
+        http_clients[verify] = httpx.AsyncClient(
+            verify=verify,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=200, max_connections=1000),
+            timeout=httpx.Timeout(None, connect=10.0),
+        )
+
+
+async def close_http_clients():
+    for client in http_clients.values():
+        await client.aclose()
+    http_clients.clear()
+
+
+# 代理配置的进程内缓存：{代理模型名称: (过期时间, 配置)}
+config_cache: Dict[str, Tuple[float, ProxyConfig]] = {}
+# 所有配置中不重复的 base_url 缓存：(过期时间, {base_url: 后端模型列表地址})
+base_urls_cache: Optional[Tuple[float, Dict[str, httpx.URL]]] = None
+
+
+# 不存在的代理模型名称的短期缓存：{代理模型名称: 过期时间}
+missing_config_cache: Dict[str, float] = {}
+MISSING_CONFIG_CACHE_MAXSIZE = 1000
+# 正在进行的配置查询：同一名称的并发未命中共用一次数据库查询，不同名称互不阻塞
+config_lookups: Dict[str, asyncio.Future] = {}
 
 
 async def get_proxy_config(proxy_model_name: str):
+    now = time.monotonic()
+    cached = config_cache.get(proxy_model_name)
+    if cached and cached[0] > now:
+        return cached[1]
+    if missing_config_cache.get(proxy_model_name, 0) > now:
+        return None
+
+    lookup = config_lookups.get(proxy_model_name)
+    if lookup is None:
+        lookup = asyncio.ensure_future(load_proxy_config(proxy_model_name))
+        config_lookups[proxy_model_name] = lookup
+        lookup.add_done_callback(
+            lambda _: config_lookups.pop(proxy_model_name, None)
+        )
+    # shield 避免某个请求被取消时连带取消其他请求共用的查询
+    return await asyncio.shield(lookup)
+
+
+async def load_proxy_config(proxy_model_name: str) -> Optional[ProxyConfig]:
     db = get_database()
-    config = await db["configurations"].find_one({"proxy_model_name": proxy_model_name})
+    config = await db["configurations"].find_one(
+        {"proxy_model_name": proxy_model_name}, {"_id": 0}
+    )
     if config:
-        return ProxyConfig(**config)
+        proxy_config = ProxyConfig.model_validate(config)
+        config_cache[proxy_model_name] = (
+            time.monotonic() + CONFIG_CACHE_TTL,
+            proxy_config,
+        )
+        return proxy_config
+
+    # 未命中的名称只缓存很短时间；名称过多时整体清空，避免随意的模型名称撑大缓存
+    if len(missing_config_cache) >= MISSING_CONFIG_CACHE_MAXSIZE:
+        missing_config_cache.clear()
+    missing_config_cache[proxy_model_name] = time.monotonic() + CONFIG_MISS_CACHE_TTL
     return None
 
 
-async def log_request_response(
-    request: Request,
-    response: httpx.Response,
-    start_time: float,
-    is_stream: bool = False,
-):
-    db = get_database()
+def invalidate_proxy_config(proxy_model_name: Optional[str] = None):
+    """使指定代理模型（不指定时为全部）的缓存配置失效"""
+    global base_urls_cache
+    if proxy_model_name is None:
+        config_cache.clear()
+        missing_config_cache.clear()
+    else:
+        config_cache.pop(proxy_model_name, None)
+        missing_config_cache.pop(proxy_model_name, None)
+    base_urls_cache = None
 
-    # 处理响应体
-    response_body = None
-    if not is_stream and response.content:
+
+async def get_distinct_base_urls() -> Dict[str, httpx.URL]:
+    global base_urls_cache
+    if base_urls_cache and base_urls_cache[0] > time.monotonic():
+        return base_urls_cache[1]
+
+    db = get_database()
+    base_urls = await db["configurations"].distinct("base_url")
+    # 加载时拼好并解析模型列表地址，请求时不再拼接，httpx 也无需重复解析
+    models_urls = {}
+    for base_url in base_urls:
         try:
-            response_body = response.json()
-        except JSONDecodeError:
+            models_urls[base_url] = httpx.URL(f"{base_url.rstrip('/')}/v1/models")
+        except Exception as e:
+            # 配置中的 base_url 无效时跳过该后端，不影响其他后端
+            logger.warning("Invalid base URL %r, skipped for models: %s", base_url, e)
+    base_urls_cache = (time.monotonic() + CONFIG_CACHE_TTL, models_urls)
+    return models_urls
+
+
+# 日志写入队列：请求处理中只把日志放入队列，由后台任务批量写入 MongoDB
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.2
+
+log_queue: Optional[asyncio.Queue] = None
+log_worker: Optional[asyncio.Task] = None
+dropped_log_count = 0
+
+
+async def start_log_worker():
+    global log_queue, log_worker
+    log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+    # 日志属于遥测数据，使用不需要确认的写入（w=0），写入延迟只剩一次 socket 发送
+    logs_collection = get_database().get_collection(
+        "logs", write_concern=WriteConcern(w=0)
+    )
+    log_worker = asyncio.create_task(consume_logs(log_queue, logs_collection))
+
+
+async def stop_log_worker():
+    # 放入结束标记，等待队列中剩余的日志写完
+    if log_worker:
+        await log_queue.put(None)
+        await log_worker
+
+
+async def consume_logs(queue: asyncio.Queue, logs_collection):
+    loop = asyncio.get_running_loop()
+    while True:
+        # 攒够一批或等待超时后批量写入
+        batch = [await queue.get()]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        while batch[-1] is not None and len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
             try:
-                # 如果不是JSON，尝试将其作为文本存储
-                response_body = response.text
-            except Exception:
-                # 如果无法解码为文本，则存储为None
-                response_body = None
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        documents = [document for document in batch if document is not None]
+        if documents:
+            try:
+                for document in documents:
+                    if isinstance(document["response_body"], bytes):
+                        document["response_body"] = await decode_response_body(
+                            document["response_body"]
+                        )
+                # w=0 的写入不能同时设置 bypass_document_validation，pymongo 会直接拒绝
+                await logs_collection.insert_many(documents, ordered=False)
+            except Exception as e:
+                # 整批作为一条消息编码，任意一条无法编码（如超过 64 位的整数）都会导致整批失败，
+                # 此时逐条重试，只影响有问题的那一条
+                logger.warning("批量写入日志时出错，改为逐条写入: %s", e)
+                for document in documents:
+                    await insert_log_document(logs_collection, document)
+
+        if batch[-1] is None:
+            return
+
+
+async def insert_log_document(logs_collection, document: dict):
+    try:
+        await logs_collection.insert_one(document)
+        return
+    except Exception as e:
+        error = e
+
+    # 请求体或响应体无法写入时替换为占位说明，保留其余字段
+    placeholder = f"<无法记录: {error}>"
+    for field in ("request_body", "response_body"):
+        if document.get(field) is not None:
+            document[field] = placeholder
+    try:
+        await logs_collection.insert_one(document)
+    except Exception as e:
+        logger.warning("写入日志时出错: %s", e)
+
+
+async def decode_response_body(content: bytes):
+    try:
+        return await parse_json(content)
+    except JSONDecodeError:
+        # 如果不是JSON，将其作为文本存储
+        return content.decode("utf-8", errors="replace")
+
+
+def enqueue_log(document: dict):
+    global dropped_log_count
+    try:
+        log_queue.put_nowait(document)
+    except asyncio.QueueFull:
+        # 队列已满时丢弃日志，避免内存无限增长
+        dropped_log_count += 1
+        # 丢弃数量每翻一倍才告警一次，避免过载时告警本身刷屏
+        if dropped_log_count & (dropped_log_count - 1) == 0:
+            logger.warning("日志队列已满，已丢弃 %d 条日志", dropped_log_count)
 
+
+# 日志中请求体/响应体最多保存的字节数，超过时只保存截断后的文本
+MAX_LOG_BODY = 64 * 1024
+
+# 超过该大小的 JSON 放到线程池中解析，避免长时间阻塞事件循环
+JSON_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+async def parse_json(content: bytes):
+    if len(content) > JSON_OFFLOAD_THRESHOLD:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, orjson.loads, content
+        )
+    return orjson.loads(content)
+
+
+def truncate_log_body(content: bytes) -> str:
+    # 截断处可能落在多字节字符中间，忽略不完整的字符
+    return content[:MAX_LOG_BODY].decode("utf-8", errors="ignore")
+
+
+async def cap_request_body(request: Request, request_body):
+    """请求体过大时改为记录截断后的原始文本"""
+    if request_body is None:
+        return None
+    raw_body = await request.body()
+    if len(raw_body) > MAX_LOG_BODY:
+        return truncate_log_body(raw_body)
+    return request_body
+
+
+async def read_request_body(request: Request):
     # 尝试获取请求体
     request_body = None
     if request.method in ["POST", "PUT"]:
@@ -53,19 +266,69 @@ async def log_request_response(
             except Exception:
                 # 如果无法解码，则存储为None
                 request_body = None
+    return request_body
+
+
+# 日志中只保存这些请求头/响应头，不复制全部头部；authorization 含有密钥，不记录
+LOGGED_REQUEST_HEADERS = ("content-type", "content-length", "user-agent", "x-request-id")
+LOGGED_RESPONSE_HEADERS = ("content-type", "content-length", "x-request-id")
+
+
+def pick_headers(headers, names) -> Dict[str, str]:
+    return {name: headers[name] for name in names if name in headers}
+
+
+def build_log_document(
+    request: Request,
+    request_body,
+    response: httpx.Response,
+    start_time: float,
+    response_body=None,
+) -> dict:
+    # 直接构造日志文档，字段与 LogEntry 保持一致，省去每次请求的模型校验和导出
+    return {
+        "timestamp": datetime.now(timezone.utc),
+        "request_method": request.method,
+        "request_path": request.url.path,
+        "request_headers": pick_headers(request.headers, LOGGED_REQUEST_HEADERS),
+        "request_body": request_body,
+        "response_status_code": response.status_code,
+        "response_headers": pick_headers(response.headers, LOGGED_RESPONSE_HEADERS),
+        "response_body": response_body,
+        "processing_time": time.time() - start_time,
+    }
 
-    log_entry = LogEntry(
-        timestamp=datetime.now(timezone.utc),
-        request_method=request.method,
-        request_path=request.url.path,
-        request_headers=dict(request.headers),
-        request_body=request_body,
-        response_status_code=response.status_code,
-        response_headers=dict(response.headers),
-        response_body=response_body,
-        processing_time=time.time() - start_time,
+
+async def log_request_response(
+    request: Request,
+    response: httpx.Response,
+    start_time: float,
+    request_body=None,
+    log_response_body: bool = True,
+):
+    # 只放入原始字节，由后台写入任务解析，请求处理中不做解析；过大的响应体直接截断为文本
+    response_body = None
+    if log_response_body and response.content:
+        if len(response.content) > MAX_LOG_BODY:
+            response_body = truncate_log_body(response.content)
+        else:
+            response_body = response.content
+
+    # 调用方已经解析过请求体时直接使用，避免再次解析
+    if request_body is None:
+        request_body = await read_request_body(request)
+    request_body = await cap_request_body(request, request_body)
+    enqueue_log(
+        build_log_document(request, request_body, response, start_time, response_body)
     )
-    await db["logs"].insert_one(log_entry.model_dump())
+
+
+def dumps_body(body) -> bytes:
+    try:
+        return orjson.dumps(body)
+    except TypeError:
+        # orjson 不支持超过 64 位的整数等情况，回退到标准库
+        return json.dumps(body).encode("utf-8")
 
 
 async def proxy_request(
@@ -77,221 +340,264 @@ async def proxy_request(
             status_code=404, detail=f"Proxy model '{proxy_model_name}' not found."
         )
 
-    backend_url = config.base_url + request.url.path
-    headers = {}
-    if authorization:
-        headers["Authorization"] = authorization
-    if config.backend_api_key:
-        headers["Authorization"] = (
-            f"Bearer {config.backend_api_key}"  # 优先使用配置中的 API Key
-        )
-
-    print(
-        f"Proxy request for model: {proxy_model_name}, backend model: {config.backend_model_name}"
+    backend_url = config.chat_completions_url
+    if config.backend_api_key or not authorization:
+        headers = config.backend_headers  # 优先使用配置中的 API Key
+    else:
+        # 配置中没有 API Key 时透传客户端的 Authorization
+        headers = {**config.backend_headers, "Authorization": authorization}
+
+    # 使用 %s 占位符，未开启 DEBUG 时不会格式化日志内容；请求头中含有密钥，不输出
+    logger.debug(
+        "Proxy request for model: %s, backend model: %s, backend URL: %s",
+        proxy_model_name,
+        config.backend_model_name,
+        backend_url,
     )
-    print(f"Backend URL: {backend_url}")
-    print(f"Headers: {headers}")
-    import pdb
 
     try:
-        async with httpx.AsyncClient(verify=not config.ignore_ssl_verify) as client:
-            start_time = time.time()
-            if request.method == "POST":
-                body = await request.json()
-                # 将代理模型名称替换为后端模型名称
-                body["model"] = config.backend_model_name
-
-                # Check if this is a streaming request
-                is_stream = body.get("stream", False)
-                print(f"Request body: {body}")
-                print(f"Is streaming request: {is_stream}")
-
-                if is_stream:
-                    print("Handling streaming request...")
-                    # For streaming responses, we need to use client.stream and return a StreamingResponse
-                    return await handle_streaming_request(
-                        client, backend_url, headers, body, request, start_time, config
-                    )
-                else:
-                    print("Handling regular request...")
-                    # Regular non-streaming request
-                    response = await client.post(
-                        backend_url, headers=headers, json=body, timeout=None
-                    )
-            elif request.method == "GET":
-                print("Handling GET request...")
-                response = await client.get(
+        client = http_clients[not config.ignore_ssl_verify]
+        start_time = time.time()
+        body = None
+        if request.method == "POST":
+            # FastAPI 解析路由参数时已缓存了 JSON 请求体，这里不会重复解析
+            body = await request.json()
+            # 将代理模型名称替换为后端模型名称
+            body["model"] = config.backend_model_name
+            # 请求体用 orjson 序列化后直接发送，Content-Type 已包含在请求头模板中
+            content = dumps_body(body)
+
+            # Check if this is a streaming request
+            is_stream = body.get("stream", False)
+            logger.debug("Request body: %s, stream: %s", body, is_stream)
+
+            if is_stream:
+                # For streaming responses, we need to use client.stream and return a StreamingResponse
+                return await handle_streaming_request(
+                    client,
                     backend_url,
-                    headers=headers,
-                    params=request.query_params,
-                    timeout=None,
+                    headers,
+                    body,
+                    content,
+                    request,
+                    start_time,
+                    config.log_response_body,
                 )
             else:
-                raise HTTPException(status_code=405, detail="Method not allowed.")
-
-            # Log the non-streaming response
-            await log_request_response(request, response, start_time, is_stream=False)
-
-            # 不使用 raise_for_status，而是检查状态码并相应处理
-            if response.status_code >= 400:
-                # 保留原始状态码，不转换为 500
-                error_content = response.text
-                try:
-                    error_detail = response.json()
-                except Exception:
-                    error_detail = error_content
-
-                # 返回与原始响应相同的状态码
-                return Response(
-                    content=json.dumps(error_detail),
-                    status_code=response.status_code,
-                    media_type="application/json",
+                # Regular non-streaming request
+                response = await client.post(
+                    backend_url, headers=headers, content=content, timeout=None
                 )
+        elif request.method == "GET":
+            response = await client.get(
+                backend_url,
+                headers=headers,
+                params=request.query_params,
+                timeout=None,
+            )
+        else:
+            raise HTTPException(status_code=405, detail="Method not allowed.")
+
+        # Log the non-streaming response
+        await log_request_response(
+            request, response, start_time, body, config.log_response_body
+        )
 
-            return response.json()
+        # 原样透传后端响应的状态码和内容（包括错误响应），不再解析后重新序列化
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type", "application/json"),
+        )
 
-    except httpx.RequestError as e:
-        # 网络错误等
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        # 无法连接到后端
         return Response(
-            content=json.dumps({"error": f"Connection error: {str(e)}"}),
+            content=orjson.dumps({"error": f"Connection error: {str(e)}"}),
             status_code=503,
             media_type="application/json",
         )
-    except Exception as e:
-        # 其他未预期的错误
-        print(f"Unexpected error in proxy_request: {e}")
+    except httpx.HTTPError as e:
+        # 连接建立后的其他后端错误（读超时、协议错误等）
         return Response(
-            content=json.dumps({"error": f"Unexpected error: {str(e)}"}),
-            status_code=500,
+            content=orjson.dumps({"error": f"Bad gateway: {str(e)}"}),
+            status_code=502,
             media_type="application/json",
         )
 
 
 async def handle_streaming_request(
-    client, backend_url, headers, body, request, start_time, config
+    client,
+    backend_url,
+    headers,
+    body,
+    content,
+    request,
+    start_time,
+    log_response_body=True,
 ):
     """Handle streaming requests and return a StreamingResponse"""
-    # Create a new client specifically for streaming to avoid closure issues
-    stream_client = httpx.AsyncClient(verify=not config.ignore_ssl_verify)
-
-    # 用于收集流式响应的所有数据
-    collected_chunks = []
+    # 以流模式发送请求，拿到响应头后即可返回，响应体由下方的生成器逐块转发
+    upstream_request = client.build_request(
+        "POST", backend_url, headers=headers, content=content, timeout=None
+    )
+    response = await client.send(upstream_request, stream=True)
 
-    async def stream_generator():
+    if response.status_code >= 400:
+        # 错误响应读取完整内容后，按原始状态码返回
         try:
-            async with stream_client.stream(
-                "POST", backend_url, headers=headers, json=body, timeout=None
-            ) as response:
-                # 先记录初始响应（不包含完整内容）
-                await log_request_response(
-                    request, response, start_time, is_stream=True
-                )
+            await response.aread()
+        finally:
+            await response.aclose()
+        await log_request_response(
+            request, response, start_time, body, log_response_body
+        )
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type", "application/json"),
+        )
 
-                # 获取数据库连接，用于更新日志
-                db = get_database()
-                log_id = None
+    # 日志在流结束（或客户端断开）时一次性写入
+    log_body = await cap_request_body(request, body)
+    # 用于收集流式响应的数据，追加到同一个缓冲区，结束时无需再拼接
+    collected = bytearray()
+    is_sse = response.headers.get("content-type", "").startswith("text/event-stream")
 
-                # 查找刚刚创建的日志记录
-                latest_log = await db["logs"].find_one(
-                    {"request_path": request.url.path}, sort=[("timestamp", -1)]
-                )
-                if latest_log:
-                    log_id = latest_log["_id"]
-
-                if response.status_code >= 400:
-                    # 对于错误响应，我们需要读取完整响应并抛出异常
-                    error_content = await response.read()
-                    try:
-                        error_json = response.json()
-                        error_detail = error_json
-                    except Exception:
-                        error_detail = error_content.decode("utf-8")
-
-                    raise HTTPException(
-                        status_code=response.status_code, detail=error_detail
-                    )
+    # 不记录响应体时不收集任何内容
+    collect_limit = MAX_LOG_BODY if log_response_body else 0
 
-                # 流式返回响应给客户端，同时收集所有块
-                async for chunk in response.aiter_bytes():
-                    collected_chunks.append(chunk)
-                    yield chunk
-
-                # 在流式传输完成后，更新日志记录以包含完整的响应内容
-                if log_id and collected_chunks:
-                    try:
-                        # 尝试将所有块合并为一个完整的响应
-                        full_response = b"".join(collected_chunks).decode("utf-8")
-
-                        # 尝试解析为JSON
-                        try:
-                            response_json = json.loads(full_response)
-                            # 更新日志记录
-                            await db["logs"].update_one(
-                                {"_id": log_id},
-                                {"$set": {"response_body": response_json}},
-                            )
-                        except JSONDecodeError:
-                            # 如果不是JSON，存储为字符串
-                            await db["logs"].update_one(
-                                {"_id": log_id},
-                                {"$set": {"response_body": full_response}},
-                            )
-                    except Exception as e:
-                        print(f"更新流式响应日志时出错: {e}")
-
-        except httpx.ConnectError as e:
-            error_msg = f"Could not connect to backend: {config.base_url}. Error: {e}"
-            yield f'data: {{"error": "{error_msg}"}}\n\n'.encode("utf-8")
+    async def stream_generator():
+        try:
+            # 流式返回响应给客户端，同时收集响应内容，超过日志上限后不再收集
+            async for chunk in response.aiter_bytes():
+                if len(collected) < collect_limit:
+                    collected.extend(chunk)
+                yield chunk
         except Exception as e:
             error_msg = f"An unexpected error occurred: {e}"
             yield f'data: {{"error": "{error_msg}"}}\n\n'.encode("utf-8")
+
+    async def finish_stream():
+        # 关闭后端响应，并记录包含完整响应内容的日志
+        try:
+            await response.aclose()
         finally:
-            # Make sure to close the client when done
-            await stream_client.aclose()
+            try:
+                enqueue_log(
+                    build_log_document(
+                        request,
+                        log_body,
+                        response,
+                        start_time,
+                        stream_response_body(collected, is_sse),
+                    )
+                )
+            except Exception as e:
+                logger.warning("记录流式响应日志时出错: %s", e)
 
-    # Return a StreamingResponse with the appropriate content type
-    response = StreamingResponse(
+    # Return a StreamingResponse with the upstream status code; finish_stream
+    # runs once the response ends, whether the body was fully sent or not
+    return ClosingStreamingResponse(
         stream_generator(),
+        on_close=finish_stream,
+        status_code=response.status_code,
         media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
     )
 
-    # Add a background task to close the client when the response is complete
-    # This ensures the client stays open during streaming but is properly closed after
-    return response
+
+class ClosingStreamingResponse(StreamingResponse):
+    """响应结束后一定会关闭响应体生成器并执行 on_close 的 StreamingResponse
+
+    客户端断开时 Starlette 既不会关闭 body_iterator，也可能不执行 background 任务，
+    后端连接会一直占用到垃圾回收为止。
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            await self.on_close()
+
+
+def stream_response_body(collected: bytearray, is_sse: bool):
+    """将收集到的流式响应转换为用于记录日志的响应体"""
+    if not collected:
+        return None
+    truncated = len(collected) > MAX_LOG_BODY
+    try:
+        full_response = truncate_log_body(collected)
+    except Exception as e:
+        logger.warning("合并流式响应日志时出错: %s", e)
+        return None
+
+    # SSE 流和被截断的内容都不是完整的 JSON，直接存储为字符串
+    if is_sse or truncated:
+        return full_response
+
+    # 尝试解析为JSON，如果不是JSON，存储为字符串
+    try:
+        return orjson.loads(full_response)
+    except JSONDecodeError:
+        return full_response
+
+
+async def fetch_backend_models(
+    client: httpx.AsyncClient,
+    request: Request,
+    base_url: str,
+    backend_url: httpx.URL,
+    headers: dict,
+) -> list:
+    """获取单个后端的模型列表，出错时返回空列表"""
+    start_time = time.time()
+    try:
+        response = await client.get(backend_url, headers=headers, timeout=None)
+        await log_request_response(request, response, start_time)
+        if response.status_code == 200:
+            return (await parse_json(response.content)).get("data") or []
+        elif response.status_code >= 400:
+            logger.warning(
+                "Error fetching models from %s: %s - %s",
+                base_url,
+                response.status_code,
+                response.text,
+            )
+    except httpx.ConnectError as e:
+        logger.warning("Could not connect to backend %s for models: %s", base_url, e)
+    except Exception:
+        logger.exception(
+            "An unexpected error occurred while fetching models from %s", base_url
+        )
+    return []
 
 
 async def proxy_models_request(
     request: Request, authorization: Optional[str] = Header(None)
 ):
-    db = get_database()
-    distinct_base_urls = await db["configurations"].distinct("base_url")
-    all_models = []
+    distinct_base_urls = await get_distinct_base_urls()
     headers = {}
     if authorization:
         headers["Authorization"] = authorization
 
-    async with httpx.AsyncClient() as client:  # 注意这里暂时没有使用 backend_api_key 和 ignore_ssl_verify
-        for base_url in distinct_base_urls:
-            backend_url = base_url + request.url.path
-            start_time = time.time()
-            try:
-                response = await client.get(backend_url, headers=headers, timeout=None)
-                await log_request_response(request, response, start_time)
-                if response.status_code == 200:
-                    models_data = response.json().get(
-                        "data",
-                    )
-                    all_models.extend(models_data)
-                elif response.status_code >= 400:
-                    print(
-                        f"Error fetching models from {base_url}: {response.status_code} - {response.json()}"
-                    )
-            except httpx.ConnectError as e:
-                print(f"Could not connect to backend {base_url} for models: {e}")
-            except Exception as e:
-                print(
-                    f"An unexpected error occurred while fetching models from {base_url}: {e}"
-                )
+    client = http_clients[True]  # 注意这里暂时没有使用 backend_api_key 和 ignore_ssl_verify
+    # 并发请求所有后端，总耗时取决于最慢的后端而不是所有后端之和
+    results = await asyncio.gather(
+        *(
+            fetch_backend_models(client, request, base_url, models_url, headers)
+            for base_url, models_url in distinct_base_urls.items()
+        )
+    )
+    all_models = [model for models in results for model in models]
 
-    return {"object": "list", "data": all_models}
+    # 使用 orjson 序列化合并后的模型列表
+    return Response(
+        content=orjson.dumps({"object": "list", "data": all_models}),
+        media_type="application/json",
+    )